@@ -3,10 +3,14 @@
 
 import os
 import sys
+import json
+import uuid
+import shutil
 import importlib.util
 import requests
 import zipfile
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 # If TQDM is installed, generate a progress bar for the download process
@@ -14,39 +18,141 @@ TQDM_ON = True
 try: from tqdm import tqdm
 except: TQDM_ON = False
 
+# If stream-unzip is installed, extract files as they download without saving the zip to disk
+STREAM_UNZIP_ON = True
+try: from stream_unzip import stream_unzip
+except: STREAM_UNZIP_ON = False
 
-def URL_DL_ZIP(targetzip, targetdir, url):
-    """Downloads and unzips zip file from url and return locations of extracted filed.
+
+def URL_DL_ZIP(targetzip, targetdir, url, session=None):
+    """Downloads and unzips zip file from url and return locations of extracted filed. If stream-unzip
+       is installed, files are extracted straight from the download and the zip itself is never saved.
     
             Parameters:
                 targetzip (str): String indicating where zip file is to be saved.
                 targetdir (str): String indicating where files are to be extracted.
                 url (str): URL where the zip exists.
+                session (requests.Session): Optional shared session to reuse pooled connections
             Returns:
                 file_locs (list of str): Returns locations for all the extracted files.
     """
+    
+    # Fall back to the module-level requests API if no session is shared
+    if session is None: session = requests
+        
+    # Stream Zip from archived site in 1 MB chunks
+    with session.get(url, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        validators = remote_validators(r)
         
-    # Save Zip from archived site
-    r = requests.get(url)
-    with open(targetzip,'wb') as f: 
-        f.write(r.content)
+        if STREAM_UNZIP_ON:
+            # Parse zip members as bytes arrive and write them straight to targetdir
+            file_locs = []
+            for fname, size, chunks in stream_unzip(r.iter_content(1024*1024)):
+                name = fname.decode()
+                if os.path.isabs(name) or '..' in name.split('/'):
+                    raise ValueError(f'Unsafe path in zip archive: {name}')
+                fpath = os.path.join(targetdir, name)
+                if name.endswith('/'):
+                    for _ in chunks: pass # (every member must be consumed)
+                    continue
+                os.makedirs(os.path.dirname(fpath), exist_ok=True)
+                # Write to a temp file and only move it into place once the member is complete
+                # (so a dropped connection never leaves a truncated file behind)
+                tmp_path = f'{fpath}.{uuid.uuid4().hex}.tmp'
+                try:
+                    with open(tmp_path, 'wb') as f:
+                        for chunk in chunks: f.write(chunk)
+                    os.replace(tmp_path, fpath)
+                finally:
+                    if os.path.exists(tmp_path): os.remove(tmp_path)
+                file_locs.append(fpath)
+        
+        else:
+            # Save Zip straight to disk (undoing any gzip/deflate Content-Encoding like r.content would)
+            r.raw.decode_content = True
+            with open(targetzip,'wb') as f: 
+                shutil.copyfileobj(r.raw, f, length=1024*1024)
+            
+    if not STREAM_UNZIP_ON:
+        # Unzipping file
+        with zipfile.ZipFile(targetzip, 'r') as zip_ref:
+            zip_ref.extractall(targetdir)
+            # Get list of files names in zip
+            files = zip_ref.namelist()
             
-    # Unzipping file
-    with zipfile.ZipFile(targetzip, 'r') as zip_ref:
-        zip_ref.extractall(targetdir)
-        # Get list of files names in zip
-        files = zip_ref.namelist()
+        # Return list of locations of extracted files   
+        file_locs = [] 
+        for file in files:
+            fpath = os.path.join(targetdir, file)
+            file_locs.append(fpath)
+    
+    # Save a sidecar with the server's cache validators so later calls can skip the download
+    # (written to a temp file and moved into place, so an interrupted run never leaves a corrupt sidecar)
+    tmp_path = f'{meta_path(targetzip)}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump({'url': url, 'files': file_locs, **validators}, f)
+        os.replace(tmp_path, meta_path(targetzip))
+    finally:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
         
-    # Return list of locations of extracted files   
-    file_locs = [] 
-    for file in files:
-        fpath = os.path.join(targetdir, file)
-        file_locs.append(fpath)
+    return file_locs
+
+
+def meta_path(targetzip):
+    """Returns the location of the cache sidecar saved next to a downloaded zip file."""
+    return os.path.splitext(targetzip)[0] + '.meta.json'
+
+
+def remote_validators(r):
+    """Extracts the HTTP cache validators (ETag / Last-Modified) from a response's headers."""
+    return {'etag': r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified')}
+
+
+def cached_file_locs(targetzip, session=None, revalidate=False):
+    """Returns locations of files previously extracted from targetzip, or None if they must be (re-)downloaded.
+    
+            Parameters:
+                targetzip (str): String indicating where the zip file was saved.
+                session (requests.Session): Optional shared session used for revalidation
+                revalidate (bool): If True, sends a HEAD request and only reuses the files if the
+                                   server's ETag / Last-Modified still match the saved values
+            Returns:
+                file_locs (list of str or None): Locations of the cached files, or None on a cache miss
+    """
+    
+    # Cache miss if the sidecar is missing or unreadable, or any of the extracted files are missing
+    if not os.path.exists(meta_path(targetzip)): return None
+    try:
+        with open(meta_path(targetzip)) as f:
+            meta = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+    file_locs = meta.get('files') or []
+    if not file_locs or not all(os.path.exists(fpath) for fpath in file_locs): return None
+    
+    if revalidate:
+        if session is None: session = requests
+        try:
+            r = session.head(meta['url'], timeout=60, allow_redirects=True)
+            r.raise_for_status()
+        except requests.RequestException:
+            return file_locs # Server unreachable, keep using the local copy
         
+        # Compare the strongest validator both sides know about
+        remote = remote_validators(r)
+        for key in ('etag', 'last_modified'):
+            if meta.get(key) and remote[key]:
+                if meta[key] != remote[key]: return None
+                break
+    
     return file_locs
 
 
-def SCF_load_data(datadir, year, filetype='summary', to_df=False):
+def SCF_load_data(datadir, year, filetype='summary', to_df=False, session=None,
+                  force=False, revalidate=False):
     """Loads SCF data for a given year into pandas data frame. Limited to 1989 and on. 
     
             Parameters:
@@ -58,15 +164,18 @@ def SCF_load_data(datadir, year, filetype='summary', to_df=False):
                     - 'raw': 5333 original encoded variables for every survey question
                        decode with https://www.federalreserve.gov/econres/files/2019map.txt
                 to_df (bool): Default False, set to True to load and return the file as a pandas dataframe
+                session (requests.Session): Optional shared session passed through to URL_DL_ZIP()
+                force (bool): Default False, set to True to re-download even if the files already exist
+                revalidate (bool): Default False, set to True to check the server's ETag / Last-Modified
+                                   before reusing previously downloaded files
             Returns:
                 SCF_data (pd.df): Data frame of imported SCF data with labels adjusted 
                 according to labels_dict in dataloading.py
     """
     
-    # Set/create target download directory for this year
+    # Set/create target download directory for this year (may race with other filetype downloads)
     targetdir = os.path.join(datadir, str(year))
-    if not os.path.exists(targetdir):
-        os.makedirs(targetdir)
+    os.makedirs(targetdir, exist_ok=True)
     
     # Set target zip file
     targetzip = os.path.join(targetdir, f'SCF{year}_data_public_{filetype}.zip')
@@ -85,8 +194,15 @@ def SCF_load_data(datadir, year, filetype='summary', to_df=False):
     url_params = file_string + str(year) + panel_string
     url = f'https://www.federalreserve.gov/econres/files/scf{url_params}s.zip'
         
+    # Reuse previously extracted files unless a fresh download is forced
+    # (only files listed in a sidecar are trusted, since it is written after a complete extract)
+    SCF_file_locs = None
+    if not force:
+        SCF_file_locs = cached_file_locs(targetzip, session, revalidate)
+    
     # Return list of locations of extracted files   
-    SCF_file_locs = URL_DL_ZIP(targetzip, targetdir, url) 
+    if SCF_file_locs is None:
+        SCF_file_locs = URL_DL_ZIP(targetzip, targetdir, url, session) 
       
     if to_df: # Option for loading as a pandas df
         SCF_data = pd.read_stata(SCF_file_locs[0])
@@ -95,7 +211,8 @@ def SCF_load_data(datadir, year, filetype='summary', to_df=False):
     # Return path of unzipped .dta file 
     else: return SCF_file_locs[0]
     
-def scrape_SCF(datadir='data', start=1989, until=2019, filetypes=['summary']):
+def scrape_SCF(datadir='data', start=1989, until=2019, filetypes=['summary'], max_workers=8,
+               force=False, revalidate=False):
     """Downloads a range of historic SCF data. Limited to 1989 and on. 
     
             Parameters:
@@ -104,33 +221,39 @@ def scrape_SCF(datadir='data', start=1989, until=2019, filetypes=['summary']):
                 until (int or str): Indicating the last year to scrape.
                 filetypes (list): List of strings indicating types of files to download.
                                   (See SCF_load_data() documentation for details)
+                max_workers (int): Number of files to download concurrently
+                force/revalidate (bool): Cache controls (See SCF_load_data() documentation for details)
             Returns:
                 paths (dict): Nested dictionary containing filepaths for all downloaded files
     """
     
-    paths = {} # Compile all downloaded filepaths
-    
     # Set/create the base target download directory
-    if not os.path.exists:
-        os.makedirs(datadir)
+    os.makedirs(datadir, exist_ok=True)
     
     # Set the range of years to scrape
     yrange = range(start, until+3, 3)
     
-    # Apply a progress monitor if TQDM is installed
-    if TQDM_ON: yrange = tqdm(yrange)
+    # Compile all downloaded filepaths (one sub-dictionary per year, keeps years in order)
+    paths = {year: {} for year in yrange}
+    
+    # Pair every year (integer) with every target filetype ('summary' or 'raw')
+    jobs = [(year, filetype) for year in yrange for filetype in filetypes]
     
-    # Iterate years (integers)
-    for year in yrange:
+    # Download files concurrently, sharing one session so connections are pooled
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futs = {ex.submit(SCF_load_data, datadir, year, filetype, session=session,
+                           force=force, revalidate=revalidate): (year, filetype)
+                for year, filetype in jobs}
         
-        # Instantiate the sub-dictionary of filetype paths for this year
-        paths[year] = {}
+        # Apply a progress monitor if TQDM is installed
+        done = as_completed(futs)
+        if TQDM_ON: done = tqdm(done, total=len(futs))
         
-        # Iterate target filetypes by keyword ('summary' or 'raw')
-        for filetype in filetypes:
+        for fut in done:
+            year, filetype = futs[fut]
             
-            # Download and save the file location. Creates the year directory if needed
-            paths[year][filetype] = SCF_load_data(datadir, year, filetype)
+            # Save the file location as each download finishes
+            paths[year][filetype] = fut.result()
     
     # Log & return dictionary with all filepaths
     return paths
\ No newline at end of file
@@ -1,4 +1,8 @@
 import os
+import io
+import uuid
+import functools
+import contextlib
 import numpy as np
 import pandas as pd
 from tqdm.notebook import tqdm
@@ -12,96 +16,269 @@ import chart_studio.tools as tls
 
 tls.set_credentials_file(username='•••••••', api_key='••••••••')
 
+# If pyarrow is installed, cache each year's .dta file as Parquet for faster loading
+PARQUET_ON = True
+try: import pyarrow, pyarrow.parquet
+except: PARQUET_ON = False
+
+# If joblib is installed, calc_zero_networth_races_overtime() can process years in parallel
+JOBLIB_ON = True
+try: from joblib import Parallel, delayed
+except: JOBLIB_ON = False
+
+# Summary variables load_df() always needs to build household IDs, races and weights
+SUMMARY_BASE_COLS = ['yy1', 'y1', 'race', 'wgt']
+
 # Custom function for pretty-printing a number with comma-separators and/or decimal vals 
 def comma_num(x, dollars=0, dec=0):
     
     if dec: x = round(x, dec)
     elif dollars: x = round(x)
-    minus = False
-    x = str(x)
-    if '-' in x:
-        minus=True
-        x = x.replace('-', '').strip()
-    parts = [list(l) for l in x.split('.')]
-    predec = parts[0]
-    if len(parts)>1: postdec = parts[-1]
-    else: postdec = None
-    
-    if len(predec)>3:
-        for i in list(range(-3, -len(predec)-1, -4)):
-            predec.insert(i, ',')
-
-    if postdec: out = '.'.join([''.join(l) for l in [predec, postdec]])
-    else: out = ''.join(predec)
-    if minus: out = '-'+out
-    if dollars: out = '$'+out
+    
+    # Let the format spec insert the comma-separators
+    out = f'{x:,}'
+    if dollars:
+        if out.startswith('-'): out = '-$'+out[1:]
+        else: out = '$'+out
     
     return out
 
 
 
 
-def load_df(year, filetype, datadir='data/'):
+def parquet_stale(fpath, pq_path):
+    """ Whether the Parquet copy of a .dta file is missing or older than the .dta file """
     
-    """ Load pre-downloaded data for a given year into a pandas dataframe. If loading summary data,
-        Households are ID'd with household_id and implicates are numbered using imputed_hh_id. The weight
-        of each household is divided by five into 'hh_wgt' for multi-implicate averaging analysis.
+    return not os.path.exists(pq_path) or os.path.getmtime(fpath) > os.path.getmtime(pq_path)
+
+
+
+def write_parquet(df, pq_path):
+    """ Save df as Parquet atomically: write a temp file in the same directory, then move it into place,
+        so an interrupted run or two processes converting the same year never leave a truncated file
+       
+       """
+    
+    tmp_path = f'{pq_path}.{uuid.uuid4().hex}.tmp'
+    try:
+        df.to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, pq_path)
+    finally:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+
+
+
+def scf_source(year, filetype, datadir='data/', cols=None, convert=True):
+    """ Locate the pre-downloaded .dta file for a given year and its Parquet copy, converting the .dta
+        file to Parquet on first use or when the .dta file is newer than the copy. Shared by load_df() and load_df_chunks().
        
            Parameters:
-                year (int or str): Indicates the year to load data from.
-                filetype ('summary' or 'raw'): Indicates the filetype to load.
-                    (See SCF_load_data() documentation for details)
-                datadir (str): Indicates the base data directory
+                year, filetype, datadir, cols: (See load_df() documentation for details)
+                convert (bool): If False, never (re)build the Parquet copy (it needs the whole file in memory)
             Returns:
-                df (pd.df): This year's dataset as a pandas dataframe
+                fpath (str): Location of the .dta file
+                pq_path (str or None): Location of an up-to-date Parquet copy, or None to read the .dta file
+                cols (list of str or None): Columns to read, with the summary base columns added
        
        """
     
-    
     fname = f'rscfp{year}.dta'
     
 
     # Define the target filename given the year
     fpath = os.path.join(datadir, str(year), fname)
     
-    # Load the file into a pandas dataframe
-    df =  pd.read_stata(fpath)
+    # Parquet copy saved next to the .dta file (much faster to read than Stata)
+    pq_path = os.path.splitext(fpath)[0] + '.parquet'
     
-    # Return the raw dataset as-is if loading the raw version (encoded variables)
-    if filetype=='raw': return df
+    # Only read the requested columns (plus those needed below for summary data)
+    if cols is not None and filetype!='raw':
+        cols = list(dict.fromkeys(SUMMARY_BASE_COLS + list(cols)))
     
+    # Convert the full .dta file to Parquet on first load (or after the .dta file is re-downloaded)
+    if not PARQUET_ON: pq_path = None
+    elif parquet_stale(fpath, pq_path):
+        if convert: write_parquet(pd.read_stata(fpath), pq_path)
+        else: pq_path = None
+        
+    return fpath, pq_path, cols
+
+
+
+def decode_summary(df):
+    """ Rename ID variables, decode races and add implicate numbers and weights to a [summary] dataframe
+        (or a chunk of one). Modifies df in place and returns it.
+       
+       """
 
     col_renames = {
         'yy1': 'household_id',
         'y1': 'imputed_hh_id',}
     df.rename(columns=col_renames, inplace=True)
     
-    # decode races (convert to string) these are directly from the codebook
-    race_map = {
-        1: 'white non-Hispanic',
-        2: 'black/African-American',
-        3: 'Hispanic',
-        4: 'Asian', # (only available in internal data set, see codebook)
-        5: 'other' }
-    df['race'] = df['race'].map(race_map)
+    # decode races (codes 1-5 as a categorical) these are directly from the codebook
+    race_cats = [
+        'white non-Hispanic',
+        'black/African-American',
+        'Hispanic',
+        'Asian', # (only available in internal data set, see codebook)
+        'other' ]
+    df['race'] = pd.Categorical.from_codes(df['race'].to_numpy().astype('int8') - 1, categories=race_cats)
     
-    # Add Implicate Number
-    df['implicate'] = [x - y*10 for x, y in zip(df['imputed_hh_id'], df['household_id'])]
+    # Add Implicate Number (imputed_hh_id = household_id*10 + implicate, implicates are 1-5)
+    df['implicate'] = (df['imputed_hh_id'].to_numpy() % 10).astype('int8')
     
     # weighting dividing by 5 for simple multi-imputation averages (ideal for regression)
-    df['hh_wgt'] = [x*5 for x in df['wgt']]
+    df['hh_wgt'] = df['wgt'].to_numpy() * 5
                       
     return df
 
 
 
+def downcast_df(df):
+    """ Shrink a dataframe's dtypes in place: float64 to float32, integers to the smallest integer type
+        that fits and text to categories. float32 keeps ~7 significant digits, so large dollar values
+        (i.e. networth) are rounded. Returns df.
+       
+       """
+    
+    for c in df.select_dtypes('float64'): df[c] = df[c].astype('float32')
+    for c in df.select_dtypes('integer'): df[c] = pd.to_numeric(df[c], downcast='integer')
+    for c in df.select_dtypes(['object', 'string']): df[c] = df[c].astype('category')
+    
+    return df
+
+
+
+def load_df(year, filetype, datadir='data/', cols=None, downcast=False):
+    
+    """ Load pre-downloaded data for a given year into a pandas dataframe. If loading summary data,
+        Households are ID'd with household_id and implicates are numbered using imputed_hh_id. The weight
+        of each household is divided by five into 'hh_wgt' for multi-implicate averaging analysis.
+        The first load converts the .dta file to a Parquet copy that is read on later loads.
+       
+           Parameters:
+                year (int or str): Indicates the year to load data from.
+                filetype ('summary' or 'raw'): Indicates the filetype to load.
+                    (See SCF_load_data() documentation for details)
+                datadir (str): Indicates the base data directory
+                cols (list of str): Original (Stata) variable names to load, default None loads all.
+                    Summary loads always include the household ID, race and weight variables
+                downcast (bool): If True, shrinks column dtypes to save memory (See downcast_df() for details)
+            Returns:
+                df (pd.df): This year's dataset as a pandas dataframe
+       
+       """
+    
+    fpath, pq_path, cols = scf_source(year, filetype, datadir, cols)
+    
+    # Load the file into a pandas dataframe. read_stata is given the path on purpose: pandas seeks
+    # through local files in place, wrapping them in mmap/BytesIO only adds a copy
+    if pq_path: df = pd.read_parquet(pq_path, columns=cols)
+    else: df = pd.read_stata(fpath, columns=cols)
+    
+    # Decode summary data, the raw version (encoded variables) is kept as-is
+    if filetype!='raw': df = decode_summary(df)
+    
+    if downcast: df = downcast_df(df)
+    
+    return df
+
+
+
+@functools.lru_cache(maxsize=32)
+def load_df_cached(year, filetype, datadir='data/', cols=None):
+    """ Memoized load_df() so repeated analyses don't re-read the same year. cols must be a tuple (hashable).
+        The same dataframe is returned on every call, so treat it as read-only (copy or .assign() to modify).
+       
+       """
+    
+    return load_df(year, filetype, datadir, None if cols is None else list(cols))
+
+
+
+def load_df_chunks(year, filetype='summary', datadir='data/', cols=None, chunksize=200_000,
+                   downcast=False):
+    
+    """ Generator version of load_df() that yields the dataset in chunks of rows, so peak memory depends
+        on the chunk size rather than the size of the file. Summary chunks are decoded like load_df().
+        Reads the Parquet copy if load_df() already made one, otherwise streams the .dta file (without
+        building the copy, which would need the whole file in memory).
+       
+           Parameters:
+                year, filetype, datadir, cols, downcast: (See load_df() documentation for details)
+                chunksize (int): Maximum number of rows per chunk
+            Yields:
+                chunk (pd.df): The next rows of this year's dataset as a pandas dataframe
+       
+       """
+    
+    fpath, pq_path, cols = scf_source(year, filetype, datadir, cols, convert=False)
+    
+    # Decode summary chunks (raw chunks are kept as-is) and optionally shrink their dtypes
+    def decode(chunk):
+        if filetype!='raw': chunk = decode_summary(chunk)
+        if downcast: chunk = downcast_df(chunk)
+        return chunk
+    
+    # Read record batches from the Parquet copy, or fall back to Stata's chunked reader
+    if pq_path:
+        batches = pyarrow.parquet.ParquetFile(pq_path).iter_batches(batch_size=chunksize, columns=cols)
+        for batch in batches: yield decode(batch.to_pandas())
+    else:
+        with pd.read_stata(fpath, columns=cols, chunksize=chunksize) as reader:
+            for chunk in reader: yield decode(chunk)
+
+
+
+def weighted_group_sums(groups, w, v, nw):
+    """Computes the weighted sums behind display_group_avgs() from plain arrays of equal length.
+       
+           Parameters:
+                groups (array-like): Category of each household (i.e. race), missing categories are skipped
+                w (np.array): Household weights
+                v (np.array): Target variable to average
+                nw (np.array): Net worth, households with nw<=0 are counted as zero or negative wealth
+            Returns:
+                sums (pd.df): Row count and sums of w, w*v and w where nw<=0 for each category
+                wsum, wvar_sum (float): Sums of w and w*v over all households
+       
+       """
+    
+    # Weighted target variable and weights of households with zero or negative net wealth
+    wvar = w * v
+    wneg = np.where(nw<=0, w, 0.0)
+    wsum = w.sum()
+    wvar_sum = wvar.sum()
+    
+    # Integer code of each household's category (categoricals already have them, -1 marks missing)
+    if isinstance(groups, pd.Categorical): codes, cats = groups.codes, groups.categories
+    else: codes, cats = pd.factorize(groups)
+    keep = codes>=0
+    if not keep.all(): codes, w, wvar, wneg = codes[keep], w[keep], wvar[keep], wneg[keep]
+    
+    # Weighted sums for every category (i.e. race) by indexed accumulation over the codes
+    n = len(cats)
+    sums = pd.DataFrame({
+        'nrows': np.bincount(codes, minlength=n),
+        'wsum': np.bincount(codes, weights=w, minlength=n),
+        'wvar_sum': np.bincount(codes, weights=wvar, minlength=n),
+        'neg_wsum': np.bincount(codes, weights=wneg, minlength=n)},
+        index=pd.Index(cats))
+    sums = sums[sums['nrows']>0] # (i.e. 'Asian' is only in the internal data set)
+    
+    return sums, wsum, wvar_sum
+
+
+
 def display_group_avgs(df, var='networth', grouper='race',
                        avg_worth=False):
     """Prints information about each racial demographic for this year. Returns the proportion of households with
         zero or negative net wealth by default.
        
            Parameters:
-                df (pd.df): Pandas dataframe of this year's [summary] dataset
+                df (pd.df or iterable of pd.df): Pandas dataframe of this year's [summary] dataset, or chunks of
+                                    it (i.e. from load_df_chunks()). Weighted sums are accumulated per chunk
                 var (str): Indicates the target variable to track
                 grouper (str): Indicates the variable to group over
                 avg_worth (bool): If True, returns the average worth of race categeory households instead of the
@@ -109,40 +286,56 @@ def display_group_avgs(df, var='networth', grouper='race',
             Returns:
                 group_avgs (pd.df): Dictionary with target stat for each category this year
                                     (i.e. {[races]: [pct_neg_wealth]}
+            Raises:
+                ValueError: If df is an empty iterable of chunks
        
        """
     
-    group_avgs = {} # 
+    # Treat a single dataframe as one chunk
+    chunks = [df] if isinstance(df, pd.DataFrame) else df
     
-    # iterate groups of each [grouper] (i.e. race)
-    for gcat in df[grouper].value_counts().index:
-        if str(gcat).lower()=='nan': continue
-            
-        # Isolate households in the given categeory (i.e. race)
-        g_df = df[df[grouper]==gcat].copy()
+    # Running weighted sums for each category (i.e. race) and for all households
+    sums = None
+    tot_wsum, tot_wvar_sum = 0, 0
+    
+    for chunk in chunks:
         
-        # apply weights to the 
-        var_wgted =  g_df.wgt * g_df[var]
-        var_avg = sum(var_wgted) / g_df.wgt.sum()
+        # Accumulate in float64 even if the data was downcast
+        chunk_sums, chunk_wsum, chunk_wvar_sum = weighted_group_sums(
+            chunk[grouper].values,
+            chunk['wgt'].to_numpy('float64'),
+            chunk[var].to_numpy('float64'),
+            chunk['networth'].to_numpy('float64'))
         
-        # Isolate households with zero or negative net wealth
-        nonetworth = g_df[g_df.networth<=0].wgt.sum()
-        pct_nonetworth = round(100*(nonetworth / (g_df.wgt.sum())), 1)
+        sums = chunk_sums if sums is None else sums.add(chunk_sums, fill_value=0)
+        tot_wsum += chunk_wsum
+        tot_wvar_sum += chunk_wvar_sum
+    
+    if sums is None: raise ValueError('display_group_avgs() received no data (empty iterable of chunks)')
+    
+    # Finalize each category's stats, from most to least common (same order as value_counts())
+    sums = sums.sort_values('nrows', ascending=False, kind='stable')
+    stats = pd.DataFrame({
+        'var_avg': sums['wvar_sum'] / sums['wsum'],
+        'wsum': sums['wsum'],
+        'neg_wsum': sums['neg_wsum'],
+        'pct_nonetworth': (100*sums['neg_wsum'] / sums['wsum']).round(1)})
+    
+    for gcat, row in stats.iterrows():
             
         # Log details about this category's wealth stats this year
         print(f'> {gcat.upper()}')
-        print(f'   > AVG {var.upper()}:', comma_num( var_avg, dollars=True))
-        print(f'   >', comma_num( round(g_df.wgt.sum()) ), 'total PEUs')
-        print(f'     >', comma_num( round(nonetworth) ),
-                  f'HHs have ≤0 networth, ({pct_nonetworth}%)')
+        print(f'   > AVG {var.upper()}:', comma_num( row['var_avg'], dollars=True))
+        print(f'   >', comma_num( round(row['wsum']) ), 'total PEUs')
+        print(f'     >', comma_num( round(row['neg_wsum']) ),
+                  f'HHs have ≤0 networth, ({row["pct_nonetworth"]}%)')
         
-        # Save either the proportion of zero-wealth HHs or the avg. net worth of HHs
-        if avg_worth: group_avgs[gcat] = var_avg
-        else: group_avgs[gcat] = pct_nonetworth
+    # Save either the proportion of zero-wealth HHs or the avg. net worth of HHs
+    if avg_worth: group_avgs = stats['var_avg'].to_dict()
+    else: group_avgs = stats['pct_nonetworth'].to_dict()
         
     # print all groups total
-    var_wgted =  df.wgt * df[var]
-    var_avg = sum(var_wgted)/sum(df.wgt)
+    var_avg = tot_wvar_sum / tot_wsum
     print()
     print(f'Total average {var}:', comma_num( round(var_avg), dollars=True))
     
@@ -151,11 +344,63 @@ def display_group_avgs(df, var='networth', grouper='race',
     
     
     
+def zero_networth_year(year, group_black_hispanic=False, subtract_car_value=False, chunksize=None):
+    """Prints and returns one year's racial wealth stats for calc_zero_networth_races_overtime()
+       (See its documentation for parameter details)
+       
+       """
+    
+    # Derive adjusted columns on a new dataframe (loaded years are cached and must not be modified)
+    def adjust(df):
+        
+        # Remove cars value from net worth (consumer durables skew the race gap)
+        if subtract_car_value:
+            nw = (df['networth'] - df['vehic']).to_numpy()
+            df = df.assign(networth=nw)
+
+        # Group black and hispanic households into a one category
+        # (relabel the few categories, then remap each household's code with one lookup)
+        if group_black_hispanic:
+            race = df['race'].array
+            labels = ['black & hispanic' if c in ('Hispanic', 'black/African-American') else c
+                      for c in race.categories]
+            new_cats = list(dict.fromkeys(labels))
+            code_map = np.array([new_cats.index(l) for l in labels] + [-1], dtype=race.codes.dtype) # -1: missing
+            df = df.assign(race=pd.Categorical.from_codes(code_map[race.codes], categories=new_cats))
+            
+        return df
+    
+    # Load the whole year at once, or lazily adjust each chunk as it is read
+    cols = ('networth', 'vehic')
+    if chunksize is None: df = adjust(load_df_cached(year, 'summary', cols=cols))
+    else: df = (adjust(chunk) for chunk in load_df_chunks(year, 'summary', cols=cols, chunksize=chunksize))
+
+    # Run function to print and save this year's racial wealth stats
+    print('\n\n'+str(year), '—'*60)
+    return display_group_avgs(df, # re-iterating defaults:
+                              'networth', # variable to track overtime
+                              'race' # variable to group over
+                             )
+
+
+
+def capture_output(func, *args, **kwargs):
+    """Calls func and returns its result along with everything it printed (i.e. from a worker process)"""
+    
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        result = func(*args, **kwargs)
+    return result, log.getvalue()
+
+
+
 def calc_zero_networth_races_overtime(
     group_black_hispanic=False,
     subtract_car_value=False,
     start=1992,
-    until=2020):
+    until=2020,
+    chunksize=None,
+    n_jobs=1):
 
     """Generates simple CSVs tracking the proportion of households with zero or negative wealth
        for each racial demographic indicated in the SCF data over time. Only works for 1992 and on
@@ -164,6 +409,9 @@ def calc_zero_networth_races_overtime(
                 group_black_hispanic (bool): Whether to group black and brown households into a combined category
                 subtract_car_value (bool): Whether to remove the value of cars (consumer durable) from net worth
                 start/until (str or int): Indicates the 
+                chunksize (int): If set, streams each year's data in chunks of this many rows to cap peak memory
+                n_jobs (int): Number of worker processes for years (-1 for all cores, requires joblib). Workers
+                              don't share load_df_cached(), so the default 1 is faster for repeated runs
             Returns:
                 data (pd.df): Returns locations for all the extracted files.
        
@@ -171,27 +419,21 @@ def calc_zero_networth_races_overtime(
 
     ot_data = {} # to compile all overtime data
     
+    years = range(start, until, 3)
+    year_args = (group_black_hispanic, subtract_car_value, chunksize)
+    
     # Iterate years
-    for year in range(start, until, 3):
-        
-        df = load_df(year, 'summary')
-
-        # Remove cars value from net worth (consumer durables skew the race gap)
-        if subtract_car_value:
-            df['networth_withcar'] = df.networth.copy()
-            df.networth -= df.vehic
-
-        # Group black and hispanic households into a one category
-        if group_black_hispanic:
-            df.race = df.race.replace('Hispanic', 'black & hispanic')
-            df.race = df.race.replace('black/African-American', 'black & hispanic')
-
-        # Run function to print and save this year's racial wealth stats
-        print('\n\n'+str(year), '—'*60)
-        ot_data[year] = display_group_avgs(df, # re-iterating defaults:
-                                           'networth', # variable to track overtime
-                                           'race' # variable to group over
-                                          )
+    if n_jobs==1 or not JOBLIB_ON:
+        for year in years:
+            ot_data[year] = zero_networth_year(year, *year_args)
+            
+    # Or fan years out across processes, printing each year's log in order once done
+    else:
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(capture_output)(zero_networth_year, year, *year_args) for year in years)
+        for year, (stats, log) in zip(years, results):
+            print(log, end='')
+            ot_data[year] = stats
 
     # Save all overtime results as a csv
     data = pd.DataFrame(ot_data)
@@ -209,14 +451,14 @@ def calc_zero_networth_races_overtime(
 
 
 
-def plot_negative_wealth_overtime(data):
-    """ Create a plotly chart of negative wealth among racial demographics overtime
+def negative_wealth_figure(data):
+    """ Build the plotly chart of negative wealth among racial demographics overtime
     
         Parameters:
                 data (pd.df): Proportions of races overtime
                     (output from calc_zero_networth_races_overtime())
         Returns:
-            Launches a new browser window with the plotly chart
+            fig (go.Figure): The chart, ready to show or upload
     
     
        
@@ -239,23 +481,23 @@ def plot_negative_wealth_overtime(data):
 
     y_data = data.values
 
-    fig = go.Figure()
-
-    for i in range(0, len(labels)):
-        fig.add_trace(go.Scatter(x=x_data[i], y=y_data[i], mode='lines',
-            name=labels[i],
-            line=dict(color=colors[i], width=line_size[i]),
-            connectgaps=True,
-        ))
+    # one line per group (a trace only has one line color)
+    traces = [go.Scatter(x=x_data[i], y=y_data[i], mode='lines',
+                  name=labels[i],
+                  line=dict(color=colors[i], width=line_size[i]),
+                  connectgaps=True,
+              ) for i in range(0, len(labels))]
 
-        # endpoints
-        fig.add_trace(go.Scatter(
-            x=[x_data[i][0], x_data[i][-1]],
-            y=[y_data[i][0], y_data[i][-1]],
-            mode='markers',
-            marker=dict(color=colors[i], size=mode_size[i])
-        ))
+    # endpoints of every line in a single trace
+    traces.append(go.Scatter(
+        x=np.concatenate([[x_data[i][0], x_data[i][-1]] for i in range(0, len(labels))]),
+        y=np.concatenate([[y_data[i][0], y_data[i][-1]] for i in range(0, len(labels))]),
+        mode='markers',
+        marker=dict(color=[colors[i] for i in range(0, len(labels)) for _ in range(2)],
+                    size=[mode_size[i] for i in range(0, len(labels)) for _ in range(2)])
+    ))
 
+    fig = go.Figure(data=traces)
 
     fig.update_layout(
         xaxis=dict(
@@ -288,25 +530,22 @@ def plot_negative_wealth_overtime(data):
         plot_bgcolor='white'
     )
 
-    annotations = []
-
-    # Adding labels
-    for y_trace, label, color in zip(y_data, labels, colors):
-        # labeling the left_side of the plot
-        annotations.append(dict(xref='paper', x=0.05, y=y_trace[0],
-                                      xanchor='right', yanchor='middle',
-                                      text=label + ' {}%'.format(y_trace[0]),
-                                      font=dict(family='Arial',
-                                                size=16),
-                                      showarrow=False))
-        # labeling the right_side of the plot
-        if all(y_trace==y_data[-1]): continue
-        annotations.append(dict(xref='paper', x=0.95, y=y_trace[-1],
-                                      xanchor='left', yanchor='middle',
-                                      text='{}%'.format(y_trace[-1]),
-                                      font=dict(family='Arial',
-                                                size=16),
-                                      showarrow=False))
+    # labeling the left_side of the plot
+    annotations = [dict(xref='paper', x=0.05, y=y_trace[0],
+                                  xanchor='right', yanchor='middle',
+                                  text=label + ' {}%'.format(y_trace[0]),
+                                  font=dict(family='Arial',
+                                            size=16),
+                                  showarrow=False)
+                   for y_trace, label in zip(y_data, labels)]
+    # labeling the right_side of the plot
+    annotations += [dict(xref='paper', x=0.95, y=y_trace[-1],
+                                  xanchor='left', yanchor='middle',
+                                  text='{}%'.format(y_trace[-1]),
+                                  font=dict(family='Arial',
+                                            size=16),
+                                  showarrow=False)
+                    for y_trace in y_data if not all(y_trace==y_data[-1])]
     # Title
     annotations.append(dict(xref='paper', yref='paper', x=0.0, y=1.07,
                                   xanchor='left', yanchor='bottom',
@@ -345,6 +584,27 @@ def plot_negative_wealth_overtime(data):
 
     fig.update_layout(annotations=annotations)
 
+    return fig
+
+
+
+
+def plot_negative_wealth_overtime(data):
+    """ Create a plotly chart of negative wealth among racial demographics overtime
+    
+        Parameters:
+                data (pd.df): Proportions of races overtime
+                    (output from calc_zero_networth_races_overtime())
+        Returns:
+            Launches a new browser window with the plotly chart
+    
+    
+       
+       """
+    
+    # Build the figure once, then render and upload it
+    fig = negative_wealth_figure(data)
+
     fig.show()
 
 